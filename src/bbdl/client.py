@@ -75,7 +75,7 @@ class SFTPClient:
             reqfile = options.tempdir / f'fprp{part:02d}.req'
             respfile = options.tempdir / f'fprp{part:02d}.out'
             Request.build(sids, fields[i:i+500], reqfile, options)
-            Request.send(self.cn, reqfile, respfile, options)
+            respfile = Request.send(self.cn, reqfile, respfile, options)
             _result = Request.parse(respfile)
             result.extend(_result)
         return result
@@ -1,4 +1,5 @@
 import csv
+import functools
 import logging
 import re
 
@@ -10,15 +11,30 @@ logger = logging.getLogger(__name__)
 
 __all__ = ['Field', 'Ticker']
 
+# Bloomberg placeholders for missing values
+NULL_VALUES = frozenset({'', 'N.A.', 'N.D.', 'N.S.'})
+TRUE_VALUES = frozenset({'1', 'T', 'TRUE', 'Y', 'YES'})
+COUNTRY_NOISE_RE = re.compile(r'[^A-Z]')
 
+
+# the same date strings repeat across rows and responses, so the parsers
+# below are memoized (cached values are shared, callers must not mutate them)
+@functools.lru_cache(maxsize=8192)
 def to_date(x, fmt=None) -> Date:
+    """Parse a date (memoized)
+
+    >>> to_date('12/1/24') == to_date('12/1/24')
+    True
+    """
     return Date.parse(x, fmt=fmt, raise_err=True)
 
 
+@functools.lru_cache(maxsize=8192)
 def to_datetime(x, fmt=None) -> DateTime:
     return DateTime.parse(x, fmt=fmt, raise_err=True)
 
 
+@functools.lru_cache(maxsize=8192)
 def to_time(x, fmt=None) -> Time:
     return Time.parse(x, fmt=fmt, raise_err=True)
 
@@ -32,20 +48,10 @@ class Field:
             ftype = Field.all_fields[field.upper()]['Field Type']
         except KeyError:
             return object
-        if ftype == 'Boolean':        return bool
-        if ftype == 'Bulk Format':    return list
-        if ftype == 'Character':      return str
-        if ftype == 'Date':           return Date
-        if ftype == 'Date or Time':   return DateTime
-        if ftype == 'Integer':        return int
-        if ftype == 'Integer/Real':   return float
-        if ftype == 'Long Character': return str
-        if ftype == 'Month/Year':     return Date
-        if ftype == 'Price':          return float
-        if ftype == 'Real':           return float
-        if ftype == 'Time':           return Time
-
-        raise ValueError(f'Unknown type: {ftype}, for mnemonic: {field}')
+        try:
+            return FIELD_TYPES[ftype]
+        except KeyError:
+            raise ValueError(f'Unknown type: {ftype}, for mnemonic: {field}')
 
     @staticmethod
     def to_python(field, value):
@@ -66,27 +72,22 @@ class Field:
         >>> Field.to_python('DDIS_AMT_OUTSTANDING_BY_YR_BNDLN', l)
         [(Date(2007, 11, 1), 100.5), (Date(2008, 11, 1), 101)]
         """
+        return Field.converter(field)(value)
+
+    @staticmethod
+    def converter(field):
+        """Value converter for field
+        """
         if field in Field._exception_convertrs:
-            return Field._exception_convertrs[field](value)
+            return Field._exception_convertrs[field]
         try:
             ftype = Field.all_fields[field.upper()]['Field Type']
         except KeyError:
             raise ValueError(f'Unknown field: {field}')
-
-        if ftype == 'Boolean':        return Field._to_bool(value)
-        if ftype == 'Bulk Format':    return Field._to_list(value)
-        if ftype == 'Character':      return Field._to_str(value)
-        if ftype == 'Date':           return to_date(value)
-        if ftype == 'Date or Time':   return to_datetime(value)
-        if ftype == 'Integer':        return Field._to_number(value)
-        if ftype == 'Integer/Real':   return Field._to_number(value)
-        if ftype == 'Long Character': return Field._to_str(value)
-        if ftype == 'Month/Year':     return to_date(value, fmt='%m/%y')
-        if ftype == 'Price':          return Field._to_number(value)
-        if ftype == 'Real':           return Field._to_number(value)
-        if ftype == 'Time':           return to_time(value)
-
-        raise ValueError(f'Unknown type: {ftype}, for mnemonic: {field}')
+        try:
+            return FIELD_CONVERTERS[ftype]
+        except KeyError:
+            raise ValueError(f'Unknown type: {ftype}, for mnemonic: {field}')
 
     @cachedstaticproperty
     def all_fields():
@@ -254,14 +255,21 @@ class Field:
         if not value:
             return
         value = value.strip()
-        if value in {'', 'N.A.', 'N.D.', 'N.S.'}:
+        if value in NULL_VALUES:
             return
         return value
 
     @staticmethod
     def _to_bool(value):
+        """Only the exact tokens 1/T/TRUE/Y/YES (any case) are true
+
+        >>> Field._to_bool('Y'), Field._to_bool('yes')
+        (True, True)
+        >>> Field._to_bool('N'), Field._to_bool('N.A.'), Field._to_bool('Tbd')
+        (False, False, False)
+        """
         value = Field._to_str(value)
-        return bool(value and value.upper()[0] in {'1', 'T', 'Y'})
+        return value is not None and value.upper() in TRUE_VALUES
 
     @staticmethod
     def _to_list(s):
@@ -287,23 +295,23 @@ class Field:
         try:
             # first char is the delimiter. Use it to split the string
             # but also skip the beginning and ending delimiters.
-            bits = s[1:-1].split(s[0])
-            # norigbits = len(bits)
-            dims = int(bits.pop(0))
+            # walk the bits with an iterator, popping from the front of
+            # the list is quadratic for long schedules
+            bits = iter(s[1:-1].split(s[0]))
+            dims = int(next(bits))
             if not 1 <= dims <= 2:
-                raise ValueError('Bulk field dimension not supported: ' + dims)
-            rows = int(bits.pop(0))
+                raise ValueError(f'Bulk field dimension not supported: {dims}')
+            rows = int(next(bits))
             cols = 1
             if dims > 1:
-                cols = int(bits.pop(0))
+                cols = int(next(bits))
             # There are row*cols values and each has a type and value
             # so rows*cols*2 bits. Then there are three extra bits at
             # the front for dims, rows and cols.
-            # assert 3 + rows * cols * 2 == norigbits
             for i in range(rows):
                 item = []
                 for j in range(cols):
-                    ftype, value = int(bits.pop(0)), bits.pop(0)
+                    ftype, value = int(next(bits)), next(bits)
                     item.append(Field._convert_bulk_field(ftype, value))
                 if cols == 1:
                     items.append(item[0])
@@ -315,6 +323,17 @@ class Field:
 
     @staticmethod
     def _convert_bulk_field(ftype, s):
+        """Convert one bulk field value by its Bloomberg type code
+
+        Schedule dates (types 5 and 9) go through memoized `to_date`
+        >>> to_date.cache_clear()
+        >>> Field._convert_bulk_field(5, '11/01/2007')
+        Date(2007, 11, 1)
+        >>> Field._convert_bulk_field(5, '11/01/2007')
+        Date(2007, 11, 1)
+        >>> to_date.cache_info().hits
+        1
+        """
         if ftype in {1, 4, 11}: return Field._to_str(s)
         if ftype in {2, 3, 13}: return Field._to_number(s)
         if ftype == 5:          return to_date(s)
@@ -333,13 +352,46 @@ class Field:
             'RETCODE': Field._to_number,
             'NFIELDS': Field._to_number,
             'DATE': to_date,
-            'CNTRY_OF_DOMICILE': lambda x: re.sub(r'[^A-Z]', r'', x),  # remove noise
+            'CNTRY_OF_DOMICILE': lambda x: COUNTRY_NOISE_RE.sub('', x),  # remove noise
             'CPN': Field._to_number,
         }
 
 
-YELLOW_KEYS = ('Comdty', 'Equity', 'Muni', 'Pfd', 'M-Mkt',
-               'Govt', 'Corp', 'Index', 'Curncy', 'Mtge')
+# Data License field type -> container type
+FIELD_TYPES = {
+    'Boolean':        bool,
+    'Bulk Format':    list,
+    'Character':      str,
+    'Date':           Date,
+    'Date or Time':   DateTime,
+    'Integer':        int,
+    'Integer/Real':   float,
+    'Long Character': str,
+    'Month/Year':     Date,
+    'Price':          float,
+    'Real':           float,
+    'Time':           Time,
+}
+
+# Data License field type -> value converter
+FIELD_CONVERTERS = {
+    'Boolean':        Field._to_bool,
+    'Bulk Format':    Field._to_list,
+    'Character':      Field._to_str,
+    'Date':           to_date,
+    'Date or Time':   to_datetime,
+    'Integer':        Field._to_number,
+    'Integer/Real':   Field._to_number,
+    'Long Character': Field._to_str,
+    'Month/Year':     lambda x: to_date(x, fmt='%m/%y'),
+    'Price':          Field._to_number,
+    'Real':           Field._to_number,
+    'Time':           to_time,
+}
+
+
+YELLOW_KEYS = frozenset({'Comdty', 'Equity', 'Muni', 'Pfd', 'M-Mkt',
+                         'Govt', 'Corp', 'Index', 'Curncy', 'Mtge'})
 
 
 class Ticker:
@@ -353,8 +405,8 @@ class Ticker:
             return
         if ' ' not in ticker:
             return ticker.upper()
-        bits = ticker.split(' ')
-        return ' '.join([_.upper() for _ in bits[:-1]] + [bits[-1].capitalize()])
+        head, _, key = ticker.rpartition(' ')
+        return f'{head.upper()} {key.capitalize()}'
 
     @staticmethod
     def is_bb_ticker(ticker):
@@ -363,10 +415,8 @@ class Ticker:
         """
         if not ticker:
             return False
-        bits = ticker.split(' ')
-        if len(bits) < 2:
-            return False
-        return not bits[-1] not in YELLOW_KEYS
+        _, sep, key = ticker.rpartition(' ')
+        return bool(sep) and key in YELLOW_KEYS
 
 
 if __name__ == '__main__':
@@ -1,13 +1,14 @@
 import contextlib
 import gzip
-import io
+import itertools
 import logging
 import time
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass, field
 from pathlib import Path
 
 from bbdl.options import BbdlOptions
-from bbdl.parser import Field
+from bbdl.parser import YELLOW_KEYS, Field
 from libb import attrdict, unique
 
 __all__ = ['Request']
@@ -48,11 +49,11 @@ END-OF-FILE
 """
 
 RC_OK = '0'
+RESPONSE_ENCODING = 'utf-8'
 COMPRESS_FLAG = 'COMPRESS=yes'
 HISTORY_PROGRAM = 'PROGRAMNAME=gethistory'
 STATUS_FIELDS = ('IDENTIFIER', 'RETCODE', 'NFIELDS')
-YELLOW_KEYS = ('Comdty', 'Equity', 'Muni', 'Pfd', 'M-Mkt',
-               'Govt', 'Corp', 'Index', 'Curncy', 'Mtge')
+YELLOW_KEYS_BY_LOWER = {k.lower(): k for k in YELLOW_KEYS}
 
 ERROR_MESSAGE = {
     '-14': 'Field is not recognized or supported by the gethistory program.',
@@ -127,73 +128,12 @@ class Request:
                        or list of ticker types ([IBM US, Equity], [88160RAG6, CUSIP])
 
         """
-        headers = [] if not options.headers else options.headers[:]
-
-        if options.begdate or options.enddate:
-            if not options.enddate:
-                options.enddate = options.begdate
-            headers.extend([
-                    HISTORY_PROGRAM,
-                    'HIST_FORMAT=horizontal',
-                    f'DATERANGE={options.begdate:"%Y%m%d"}|{options.enddate:"%Y%m%d"}',
-                    ])
-        else:
-            headers.extend([
-                    'SECMASTER=yes',
-                    'CLOSINGVALUES=yes',
-                    'DERIVED=yes',
-                    ])
-
-        with Path(reqfile).open('w') as f:
-            # headers
-            if options.bval:
-                f.write(BVAL_REQUEST_HEADER.format(**options.__dict__))
-            else:
-                f.write(REQUEST_HEADER.format(**options.__dict__))
-            if headers:
-                f.write('\n'.join(headers) + '\n')
-            if options.compressed and COMPRESS_FLAG not in headers:
-                f.write(COMPRESS_FLAG + '\n')
-            if options.usernumber and options.is_bba:
-                f.write(TERMINAL_HEADER_BBA.format(**options.__dict__))
-            elif options.usernumber:
-                f.write(TERMINAL_HEADER.format(**options.__dict__))
-            f.write('\n')
-            # fields
-            f.write('START-OF-FIELDS\n')
-            for fld in fields:
-                f.write(fld + '\n')
-            f.write('END-OF-FIELDS\n')
-            f.write('\n')
-            # identifiers
-            f.write('START-OF-DATA\n')
-            for iden in identifiers:
-                # bb tickers don't need a type, just the value
-                if not isinstance(iden, tuple | list) or len(iden) == 1 or iden[-1] is None:
-                    iden = iden[0] if isinstance(iden, tuple | list) else iden
-                    origkey = iden.split(' ')[-1]
-                    capkey = origkey.capitalize()
-                    # yellow keys must be properly cased
-                    if capkey in YELLOW_KEYS:
-                        iden = iden.replace(origkey, capkey)
-                    f.write(f'{iden}\n')
-                # other identifiers need a value and a type
-                elif len(iden) == 2:
-                    f.write('{}|{}\n'.format(*iden))
-                # overrides need a list of field/value pairs
-                elif len(iden) > 3 and len(iden) % 2 == 0:
-                    f.write('{}|{}'.format(*iden[:2]))
-                    f.write(f'{int(len(iden) / 2 - 1)}')
-                    f.write('|'.join([str(x) for x in iden[2:]]) + '\n')
-                else:
-                    raise ValueError('Unexpected idtype format: %s' + str(iden))
-            f.write('END-OF-DATA\n')
-            f.write('\n')
-            # trailer
-            f.write(REQUEST_TRAILER)
-
-        with Path(reqfile).open('r') as f:
-            logger.debug('Wrote request file:\n' + f.read())
+        payload = _format_request(identifiers, fields, options)
+        # request protocol is ASCII, write bytes to avoid newline translation
+        Path(reqfile).write_bytes(payload.encode('ascii'))
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Wrote request file:\n%s', payload)
 
         return reqfile
 
@@ -202,7 +142,7 @@ class Request:
         reqname = reqfile.name
         respname = respfile.name
         if options.compressed:
-            respfile = Path(respfile.parts[:-1]+respfile.parts[-1]+'.gz')
+            respfile = respfile.with_name(respfile.name + '.gz')
             respname += '.gz'
         # send request
         with contextlib.suppress(Exception):
@@ -217,17 +157,16 @@ class Request:
             if found:
                 logger.debug('Retrieving output file...')
                 ftpcn.getbinary(respname, respfile)
-                if options.compressed:
-                    _unzip(respfile)
                 break
         else:
             raise Exception(f'Timeout waiting for reply file: {respname}')
+        return respfile
 
     @staticmethod
     def parse(respfile: Path) -> Result:
         """Parses respfile
 
-        respfile: Saved from `send` step
+        respfile: Saved from `send` step, `.gz` files are read compressed
 
         Returns
         data := List[Dict]
@@ -235,73 +174,158 @@ class Request:
         columns := List[(str, type)]
 
         """
-        with Path(respfile).open('r') as f:
+        if Path(respfile).suffix == '.gz':
+            with gzip.open(respfile, 'rt', encoding=RESPONSE_ENCODING,
+                           errors='replace') as f:
+                return _parse(f)
+        with Path(respfile).open(encoding=RESPONSE_ENCODING, errors='replace') as f:
             return _parse(f)
 
 
+def _format_request(identifiers: list, fields: list, options: BbdlOptions) -> str:
+    """Format request file contents (see `Request.build`)
+    """
+    headers = [] if not options.headers else options.headers[:]
+
+    if options.begdate or options.enddate:
+        if not options.enddate:
+            options.enddate = options.begdate
+        headers.extend([
+                HISTORY_PROGRAM,
+                'HIST_FORMAT=horizontal',
+                f'DATERANGE={options.begdate:"%Y%m%d"}|{options.enddate:"%Y%m%d"}',
+                ])
+    else:
+        headers.extend([
+                'SECMASTER=yes',
+                'CLOSINGVALUES=yes',
+                'DERIVED=yes',
+                ])
+
+    # headers
+    header = BVAL_REQUEST_HEADER if options.bval else REQUEST_HEADER
+    lines = header.format(**options.__dict__).splitlines()
+    lines.extend(headers)
+    if options.compressed and COMPRESS_FLAG not in headers:
+        lines.append(COMPRESS_FLAG)
+    if options.usernumber and options.is_bba:
+        lines.extend(TERMINAL_HEADER_BBA.format(**options.__dict__).splitlines())
+    elif options.usernumber:
+        lines.extend(TERMINAL_HEADER.format(**options.__dict__).splitlines())
+    lines.append('')
+    # fields
+    lines.append('START-OF-FIELDS')
+    lines.extend(fields)
+    lines.append('END-OF-FIELDS')
+    lines.append('')
+    # identifiers
+    lines.append('START-OF-DATA')
+    lines.extend(map(_format_identifier, identifiers))
+    lines.append('END-OF-DATA')
+    lines.append('')
+    # trailer
+    lines.extend(REQUEST_TRAILER.splitlines())
+    return '\n'.join(lines) + '\n'
+
+
+def _format_identifier(iden) -> str:
+    """Format identifier as a request data line (without newline)
+    """
+    # bb tickers don't need a type, just the value
+    if not isinstance(iden, tuple | list) or len(iden) == 1 or iden[-1] is None:
+        iden = iden[0] if isinstance(iden, tuple | list) else iden
+        suffix = iden.rsplit(' ', 1)[-1]
+        canon = YELLOW_KEYS_BY_LOWER.get(suffix.lower())
+        # yellow keys must be properly cased
+        if canon and canon != suffix:
+            iden = iden[:-len(suffix)] + canon
+        return iden
+    # other identifiers need a value and a type
+    if len(iden) == 2:
+        return '{}|{}'.format(*iden)
+    # overrides need a list of field/value pairs
+    if len(iden) > 3 and len(iden) % 2 == 0:
+        head = '{}|{}|{}|'.format(*iden[:2], len(iden) // 2 - 1)
+        return head + '|'.join(map(str, iden[2:]))
+    raise ValueError(f'Unexpected idtype format: {iden}')
+
+
 def _unzip(zipfile: Path):
     """Unzip the file and and leave it in place of the .gz version
+
+    Not used by `send`/`parse` (which read the .gz directly), kept for
+    inspecting compressed responses by hand.
     """
-    unzipfile = Path(zipfile.parts[:-1]+zipfile.parts[-1][:-3])  # assume .gz
-    with Path(unzipfile).open('w') as f:
-        f.write(gzip.open(zipfile.as_posix()).read())
+    unzipfile = zipfile.with_suffix('')  # assume .gz
+    with gzip.open(zipfile) as f:
+        unzipfile.write_bytes(f.read())
     zipfile.unlink(missing_ok=True)
 
 
-def _parse(f: io.TextIOBase):
-    """Parses opened respfile
+def _advance_until(lines: Iterator[str], marker: str):
+    """Consume lines up to and including `marker`
+    """
+    for line in lines:
+        if line.strip() == marker:
+            return
+
+
+def _field_converter(fld: str):
+    """Value converter for a response column (unknown fields parse to None)
+    """
+    try:
+        return Field.converter(fld)
+    except ValueError as exc:
+        logger.debug(f'No converter for fld={fld}: {str(exc)}')
+        return lambda val: None
+
+
+def _field_type(fld: str) -> type:
+    try:
+        return Field.to_type(fld)
+    except ValueError:
+        return object
+
+
+def _parse(lines: Iterable[str]):
+    """Parses respfile lines (an opened respfile works as well)
     """
     res = Result()
+    lines = iter(lines)
 
-    # parse out the field names
+    # preamble, up to the field names
     is_history = False
-    infields = False
-    fields = []
-    while True:
-        line = f.readline().strip()
+    for line in lines:
+        line = line.strip()
         if line == HISTORY_PROGRAM:
             is_history = True
-        if line == 'START-OF-FIELDS':
-            assert not infields
-            infields = True
-            continue
-        if line == 'END-OF-FIELDS':
-            assert infields
-            break
-        if not infields:
-            continue
-        fields.append(line)
-
-    indata = False
-    while True:
-        line = f.readline().strip()
-        if line == 'START-OF-DATA':
-            assert not indata
-            indata = True
-            continue
-        if line == 'END-OF-DATA':
-            assert indata
+        elif line == 'START-OF-FIELDS':
             break
-        if not indata:
-            continue
 
-        status_fields = list(STATUS_FIELDS)[:]
-        if is_history:
-            status_fields.append('DATE')
+    # parse out the field names
+    fields = list(itertools.takewhile(lambda x: x != 'END-OF-FIELDS',
+                                      map(str.strip, lines)))
+
+    _advance_until(lines, 'START-OF-DATA')
+
+    status_fields = list(STATUS_FIELDS) + (['DATE'] if is_history else [])
+    all_fields = status_fields + fields
+    converters = [_field_converter(fld) for fld in all_fields]
+
+    # data lines, only the end marker is checked
+    for line in lines:
+        if line.startswith('END-OF-DATA'):
+            break
         # ignore the last field since the line ends with a |
         flds = line.split('|')[:-1]
         if flds[1] == RC_OK:
-            row = attrdict(zip(status_fields + fields, flds))
-            for fld, val in row.items():
+            row = attrdict()
+            for fld, convert, val in zip(all_fields, converters, flds):
                 try:
-                    row[fld] = Field.to_python(fld, val)
+                    row[fld] = convert(val)
                 except Exception as exc:
                     logger.debug(f'Error converting fld={fld}, val={val}: {str(exc)}')
                     row[fld] = None
-                try:
-                    res.columns.append((fld, Field.to_type(fld)))
-                except:
-                    res.columns.apppend((fld, object))
             res.data.append(row)
         else:
             msg = ERROR_MESSAGE.get(flds[1])
@@ -311,28 +335,27 @@ def _parse(f: io.TextIOBase):
             row.RETMSG = msg
             res.errors.append(row)
 
+    if res.data:
+        res.columns = [(fld, _field_type(fld)) for fld in all_fields]
+
     # Convert historical data to time series for each field.
     # Right now it's just a bunch of rows, one for each ticker/date
     # combination. So we convert it to one row per identifier and each
     # field is now a list of values, one for each date. The additional
     # DATE field will have the list of actual observation dates for the data.
     if is_history:
-        tickers = []
         datamap = {}
         for row in res.data:
-            if row.IDENTIFIER not in tickers:
-                tickers.append(row.IDENTIFIER)
-                datamap[row.IDENTIFIER] = attrdict()
-                for key in row:
-                    if key in STATUS_FIELDS:
-                        datamap[row.IDENTIFIER][key] = row[key]
-                    else:
-                        datamap[row.IDENTIFIER][key] = [row[key]]
+            entry = datamap.get(row['IDENTIFIER'])
+            if entry is None:
+                datamap[row['IDENTIFIER']] = attrdict(
+                    (key, val if key in STATUS_FIELDS else [val])
+                    for key, val in row.items())
             else:
-                for key in row:
+                for key, val in row.items():
                     if key not in STATUS_FIELDS:
-                        datamap[row.IDENTIFIER][key].append(row[key])
-        # keep them in the same identifier order
-        res.data = [datamap[t] for t in tickers]
+                        entry[key].append(val)
+        # dict keeps them in the same identifier order
+        res.data = list(datamap.values())
 
     return res
@@ -0,0 +1,115 @@
+import gzip
+import io
+
+import pytest
+from bbdl import Request
+from bbdl.request import _parse
+from date import Date
+
+RESPONSE = """\
+START-OF-FILE
+PROGRAMFLAG=adhoc
+DELIMITER=|
+START-OF-FIELDS
+ID_BB_GLOBAL
+PX_LAST
+END-OF-FIELDS
+TIMESTARTED=Tue Jan  2 18:00:00 EST 2024
+START-OF-DATA
+IBM US Equity|0|2|BBG000BLNNH6|145.5|
+BAD US Equity|10|2| | |
+AAPL US Equity|0|2|BBG000B9XRY4|190|
+END-OF-DATA
+TIMEFINISHED=Tue Jan  2 18:00:05 EST 2024
+END-OF-FILE
+"""
+
+HISTORY_RESPONSE = """\
+START-OF-FILE
+PROGRAMNAME=gethistory
+DATERANGE=20240102|20240103
+START-OF-FIELDS
+PX_LAST
+END-OF-FIELDS
+START-OF-DATA
+IBM US Equity|0|1|20240102|145.5|
+AAPL US Equity|0|1|20240102|190|
+IBM US Equity|0|1|20240103|146|
+AAPL US Equity|0|1|20240103|191.5|
+END-OF-DATA
+END-OF-FILE
+"""
+
+
+def test_parse_compressed_matches_uncompressed(tmp_path):
+    respfile = tmp_path / 'fprp00.out'
+    respfile.write_text(RESPONSE)
+    gzfile = tmp_path / 'fprp00.out.gz'
+    gzfile.write_bytes(gzip.compress(RESPONSE.encode('ascii')))
+
+    res = Request.parse(respfile)
+    gzres = Request.parse(gzfile)
+
+    assert [r['IDENTIFIER'] for r in res.data] == ['IBM US Equity', 'AAPL US Equity']
+    assert gzres.data == res.data
+    assert gzres.errors == res.errors
+    assert gzres.columns == res.columns
+
+
+def test_parse_non_utf8_byte(tmp_path):
+    raw = RESPONSE.encode('ascii')
+    raw = raw.replace(b'BBG000BLNNH6', b'Soci\xe9t\xe9')  # latin-1 e-acute
+    respfile = tmp_path / 'fprp00.out'
+    respfile.write_bytes(raw)
+    gzfile = tmp_path / 'fprp00.out.gz'
+    gzfile.write_bytes(gzip.compress(raw))
+
+    res = Request.parse(respfile)
+    gzres = Request.parse(gzfile)
+
+    assert res.data[0].ID_BB_GLOBAL == 'Soci\ufffdt\ufffd'
+    assert gzres.data == res.data
+
+
+def test_parse_error_row():
+    res = _parse(io.StringIO(RESPONSE))
+    assert len(res.data) == 2
+    assert len(res.errors) == 1
+    error = res.errors[0]
+    assert error.IDENTIFIER == 'BAD US Equity'
+    assert error.RETCODE == '10'
+    assert error.RETMSG == 'Bloomberg cannot find the security as specified.'
+    assert res.data[0].PX_LAST == 145.5
+    assert [c for c, _ in res.columns] == ['IDENTIFIER', 'RETCODE', 'NFIELDS',
+                                           'ID_BB_GLOBAL', 'PX_LAST']
+
+
+def test_parse_history_interleaved():
+    res = _parse(io.StringIO(HISTORY_RESPONSE))
+    assert [r.IDENTIFIER for r in res.data] == ['IBM US Equity', 'AAPL US Equity']
+    ibm, aapl = res.data
+    assert ibm.DATE == [Date(2024, 1, 2), Date(2024, 1, 3)]
+    assert ibm.PX_LAST == [145.5, 146]
+    assert aapl.DATE == [Date(2024, 1, 2), Date(2024, 1, 3)]
+    assert aapl.PX_LAST == [190, 191.5]
+    assert ibm.RETCODE == 0
+
+
+def test_parse_crlf_lines():
+    crlf = RESPONSE.replace('\n', '\r\n')
+    res = _parse(io.StringIO(crlf, newline=''))
+    expected = _parse(io.StringIO(RESPONSE))
+    assert res.data == expected.data
+    assert res.errors == expected.errors
+    assert res.columns == expected.columns
+
+
+def test_parse_unknown_field():
+    response = RESPONSE.replace('PX_LAST\n', 'NOT_A_BLOOMBERG_FIELD\n')
+    res = _parse(io.StringIO(response))
+    assert [r.NOT_A_BLOOMBERG_FIELD for r in res.data] == [None, None]
+    assert ('NOT_A_BLOOMBERG_FIELD', object) in res.columns
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
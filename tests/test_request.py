@@ -1,23 +1,8 @@
-from pathlib import Path
-
 import pytest
-from asserts import assert_equal
 from bbdl import BbdlOptions, Request
+from bbdl.request import _format_request
 
-from libb.dir import make_tmpdir
-
-
-def test_basic_request():
-    identifiers = ['IBM US Equity', '88160RAG6 Corp']
-    fields = ['ID_BB_GLOBAL', 'PARSEKYABLE_DES', 'PX_LAST']
-
-    with make_tmpdir() as tmpdir:
-        reqfile = Path(tmpdir) / 'reqfile.out'
-        options = BbdlOptions(programflag='adhoc')
-        Request.build(identifiers, fields, reqfile, options)
-        with Path(reqfile).open('r') as f:
-            resp = f.read()
-        expected = """\
+EXPECTED_BASIC_REQUEST = """\
 START-OF-FILE
 FIRMNAME=None
 PROGRAMFLAG=adhoc
@@ -41,7 +26,45 @@ END-OF-DATA
 
 END-OF-FILE
 """
-        assert_equal(resp, expected)
+
+
+def test_basic_request():
+    identifiers = ['IBM US Equity', '88160RAG6 Corp']
+    fields = ['ID_BB_GLOBAL', 'PARSEKYABLE_DES', 'PX_LAST']
+
+    options = BbdlOptions(programflag='adhoc')
+    resp = _format_request(identifiers, fields, options)
+    assert resp == EXPECTED_BASIC_REQUEST, resp
+
+
+def test_build_writes_ascii_bytes(tmp_path):
+    identifiers = ['IBM US Equity', '88160RAG6 Corp']
+    fields = ['ID_BB_GLOBAL', 'PARSEKYABLE_DES', 'PX_LAST']
+
+    reqfile = tmp_path / 'reqfile.req'
+    options = BbdlOptions(programflag='adhoc')
+    Request.build(identifiers, fields, reqfile, options)
+    assert reqfile.read_bytes() == EXPECTED_BASIC_REQUEST.encode('ascii')
+
+
+def test_override_request():
+    identifiers = [('IBM US', 'TICKER', 'PRICING_SOURCE', 'BGN', 'DVD_CRNCY', 'USD')]
+    fields = ['PX_LAST']
+
+    options = BbdlOptions(programflag='adhoc')
+    resp = _format_request(identifiers, fields, options)
+    data = resp.split('START-OF-DATA\n')[1].split('END-OF-DATA')[0]
+    assert data == 'IBM US|TICKER|2|PRICING_SOURCE|BGN|DVD_CRNCY|USD\n', data
+
+
+def test_yellow_key_case():
+    identifiers = ['ibm us m-mkt', 'IBM US EQUITY', '88160RAG6 Corp']
+    fields = ['PX_LAST']
+
+    options = BbdlOptions(programflag='adhoc')
+    resp = _format_request(identifiers, fields, options)
+    data = resp.split('START-OF-DATA\n')[1].split('END-OF-DATA')[0]
+    assert data == 'ibm us M-Mkt\nIBM US Equity\n88160RAG6 Corp\n', data
 
 
 if __name__ == '__main__':